@@ -35,13 +35,103 @@ author = u'Python Control Developers'
 
 # Version information - read from the source code
 import re
+import subprocess
+import functools
 import control
 
+_DOC_DIR = os.path.dirname(os.path.abspath(__file__))
+_GIT_DIR = os.path.join(_DOC_DIR, os.pardir, '.git')
+_GIT_CACHE = os.path.join(_DOC_DIR, '_build', '.git-describe-cache')
+
+
+def _git_head_key():
+    """Return a key identifying the current git HEAD (or None)."""
+    head = os.path.join(_GIT_DIR, 'HEAD')
+    try:
+        key = [str(os.stat(head).st_mtime_ns)]
+        with open(head) as f:
+            ref = f.read().strip()
+        # Follow symbolic refs so that new commits on a branch change the key
+        if ref.startswith('ref: '):
+            ref = os.path.join(_GIT_DIR, *ref[5:].split('/'))
+            if os.path.exists(ref):
+                key.append(str(os.stat(ref).st_mtime_ns))
+            else:
+                return None         # packed ref; can't detect changes
+        # New tags change the output of 'git describe' as well
+        tags = os.path.join(_GIT_DIR, 'refs', 'tags')
+        if os.path.isdir(tags):
+            key.append(str(os.stat(tags).st_mtime_ns))
+        return ':'.join(key)
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _git_describe():
+    """Get the output of 'git describe', using a cached value if possible.
+
+    The result is stored in `_build/.git-describe-cache`, keyed by the
+    modification time of the git HEAD, so that repeated builds do not need
+    to run git.  If git is not available (e.g., when building from a source
+    distribution), the version stored in `control/_version.py` is used.
+
+    """
+    key = _git_head_key()
+    if key is not None:
+        try:
+            with open(_GIT_CACHE) as f:
+                cached_key, value = f.read().split('\n')[:2]
+            if cached_key == key:
+                return value
+        except (OSError, ValueError):
+            pass
+
+    try:
+        result = subprocess.run(
+            ['git', 'describe'], cwd=_DOC_DIR, capture_output=True,
+            text=True, check=False)
+        value = result.stdout.strip() if result.returncode == 0 else ''
+    except OSError:
+        value = ''
+
+    if not value:
+        # Fall back to the version written by setuptools-scm
+        return getattr(control, '__version__', '')
+
+    if key is not None:
+        try:
+            os.makedirs(os.path.dirname(_GIT_CACHE), exist_ok=True)
+            with open(_GIT_CACHE, 'w') as f:
+                f.write(key + '\n' + value + '\n')
+        except OSError:
+            pass
+    return value
+
+
+# Pattern used to extract the short X.Y.Z[.postN] version from the output
+# of 'git describe'.
+_VERSION_RE = re.compile(r'^v?(?P<short>\d+\.\d+\.\d+(?:\.post\d+)?).*$')
+
+# Pattern matching the commit information that 'git describe' appends for
+# commits after the last tag (e.g., '-5-g1234abc'), or a local version
+# label in the version written by setuptools-scm (e.g., '+g1234abc').
+_DESCRIBE_SUFFIX_RE = re.compile(r'(-\d+-g[0-9a-f]+|\+.*)$')
+
 # Get the version number for this commmit (including alpha/beta/rc tags)
-release = re.sub('^v', '', os.popen('git describe').read().strip())
+_raw_version = _git_describe().lstrip('v')
+
+# The release is stored in the pickled environment, so the commit
+# information is dropped to allow development builds on top of the same tag
+# to reuse the cached environment
+release = _DESCRIBE_SUFFIX_RE.sub('', _raw_version)
 
 # The short X.Y.Z version
-version = re.sub(r'(\d+\.\d+\.\d+(.post\d+)?)(.*)', r'\1', release)
+_match = _VERSION_RE.match(_raw_version)
+version = _match.group('short') if _match else release
+
+# Source links point to the main branch unless building an exact release
+_dev_build = _raw_version != version
 
 print("version %s, release %s" % (version, release))
 
@@ -56,19 +146,46 @@ needs_sphinx = '3.1'
 # ones.
 extensions = [
     'sphinx.ext.autodoc', 'sphinx.ext.todo', 'sphinx.ext.napoleon',
-    'sphinx.ext.intersphinx', 'sphinx.ext.imgmath',
+    'sphinx.ext.intersphinx', 'sphinx.ext.mathjax',
     'sphinx.ext.autosummary', 'nbsphinx', 'numpydoc',
     'sphinx.ext.linkcode', 'sphinx.ext.doctest'
 ]
 
+# Setting FAST_DOCS in the environment generates the API reference pages
+# using sphinx-autoapi (which parses the source files) instead of generating
+# autosummary stub pages.  The package is still imported (by this file and
+# by the autosummary tables in the manual), and the links from those tables
+# to the missing stub pages produce warnings, so this mode is only intended
+# for previewing changes locally.
+fast_docs = bool(os.environ.get('FAST_DOCS'))
+
+if fast_docs:
+    extensions.append('autoapi.extension')
+    autoapi_type = 'python'
+    autoapi_dirs = ['../control']
+    autoapi_ignore = ['*/tests/*', '*/bench/*']
+    autoapi_options = ['members', 'inherited-members', 'show-inheritance']
+    autoapi_keep_files = True
+
+# Math is rendered in the browser using MathJax, loaded from the default
+# CDN for the Sphinx version in use (the LaTeX builder handles math
+# natively).  For offline use, set MATHJAX_PATH to a local copy of MathJax.
+if os.environ.get('MATHJAX_PATH'):
+    mathjax_path = os.environ['MATHJAX_PATH']
+
 # scan documents for autosummary directives and generate stub pages for each.
-autosummary_generate = True
+autosummary_generate = not fast_docs
+
+# only document the members of modules listed in __all__ (if defined)
+autosummary_ignore_module_all = False
 
 # list of autodoc directive flags that should be automatically applied
 # to all autodoc directives.
+# Inherited members are only documented where requested explicitly (see
+# _templates/custom-class-template.rst).
 autodoc_default_options = {
     'members': True,
-    'inherited-members': True,
+    'show-inheritance': True,
     'exclude-members': '__init__, __weakref__, __repr__, __str__'
 }
 
@@ -94,20 +211,32 @@ language = 'en'
 # List of patterns, relative to source directory, that match files and
 # directories to ignore when looking for source files.
 # This pattern also affects html_static_path and html_extra_path .
-exclude_patterns = [u'_build', 'Thumbs.db', '.DS_Store',
-                    '*.ipynb_checkpoints']
+exclude_patterns = [u'_build', '_inv', 'Thumbs.db', '.DS_Store',
+                    '.ipynb_checkpoints', '**/.ipynb_checkpoints',
+                    '__pycache__', '**/__pycache__']
+
+# Ignore pages left over from a FAST_DOCS build
+if not fast_docs:
+    exclude_patterns.append('autoapi')
 
 # The name of the Pygments (syntax highlighting) style to use.
 pygments_style = 'sphinx'
 
 # This config value contains the locations and names of other projects that
 # should be linked to in this documentation.
+# Local copies of the inventories in _inv/ (see 'make inventories') are
+# used if present, so that builds do not need to access the network.
 intersphinx_mapping = \
-    {'scipy': ('https://docs.scipy.org/doc/scipy/reference', None),
-     'numpy': ('https://numpy.org/doc/stable', None),
-     'matplotlib': ('https://matplotlib.org/', None),
+    {'scipy': ('https://docs.scipy.org/doc/scipy/reference',
+               ('_inv/scipy.inv', None)),
+     'numpy': ('https://numpy.org/doc/stable', ('_inv/numpy.inv', None)),
+     'matplotlib': ('https://matplotlib.org/',
+                    ('_inv/matplotlib.inv', None)),
      }
 
+# Number of days to keep remote inventories cached (in the doctree directory)
+intersphinx_cache_limit = 90
+
 # If this is True, todo and todolist produce output, else they produce nothing.
 # The default is False.
 todo_include_todos = True
@@ -131,8 +260,84 @@ html_theme = 'sphinx_rtd_theme'
 # so a file named "default.css" will overwrite the builtin "default.css".
 
 html_static_path = ['_static']
+
+# Notebooks are rendered using their stored outputs
+nbsphinx_execute = 'never'
+nbsphinx_allow_errors = False
+
+# If notebooks are executed (e.g., 'sphinx-build -D nbsphinx_execute=always'),
+# notebooks whose contents have not changed since the last build are not
+# read (and executed) again, unless the configuration has changed.  The
+# hashes of the notebooks are stored next to the pickled environment in the
+# doctree directory.
+import json
+import hashlib
+
+_NB_HASH_FILE = 'nb-hashes.json'
+_nb_hashes = {}
+
+def _notebook_hash(filename):
+    with open(filename, encoding='utf-8') as f:
+        notebook = json.load(f)
+    return hashlib.sha256(
+        json.dumps(notebook, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _skip_unchanged_notebooks(app, env, docnames):
+    from sphinx.environment import CONFIG_OK
+    if app.config.nbsphinx_execute == 'never':
+        return
+
+    # Documents scheduled because of a configuration change must be re-read
+    skip = env.config_status == CONFIG_OK
+
+    try:
+        with open(os.path.join(app.doctreedir, _NB_HASH_FILE)) as f:
+            _nb_hashes.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+    for docname in list(docnames):
+        filename = env.doc2path(docname)
+        if not str(filename).endswith('.ipynb'):
+            continue
+        digest = _notebook_hash(filename)
+        if skip and docname in env.all_docs and \
+           _nb_hashes.get(docname) == digest:
+            docnames.remove(docname)
+        _nb_hashes[docname] = digest
+
+def _save_notebook_hashes(app, exception):
+    if exception is None and _nb_hashes:
+        with open(os.path.join(app.doctreedir, _NB_HASH_FILE), 'w') as f:
+            json.dump(_nb_hashes, f, indent=0, sort_keys=True)
+
+# Configuration values are pickled along with the environment, and a value
+# that cannot be pickled forces Sphinx to re-read all documents on every
+# build.  Any new value set in this file must therefore be pickle-safe.
+# Sphinx 7.3 and later report such values themselves; for older versions,
+# this check warns about them.
+import pickle
+
+def _check_config_pickle(app, config):
+    from sphinx.util import logging
+    logger = logging.getLogger(__name__)
+    for name, (default, rebuild, types) in config.values.items():
+        if not rebuild:
+            continue            # value does not affect rebuilds
+        try:
+            pickle.dumps(getattr(config, name))
+        except Exception:
+            logger.warning(
+                "configuration value %r cannot be pickled; incremental "
+                "builds will be disabled", name)
+
 def setup(app):
     app.add_css_file('css/custom.css')
+    import sphinx
+    if sphinx.version_info < (7, 3):
+        app.connect('config-inited', _check_config_pickle)
+    app.connect('env-before-read-docs', _skip_unchanged_notebooks)
+    app.connect('build-finished', _save_notebook_hashes)
 
 # Custom sidebar templates, must be a dictionary that maps document names
 # to template names.
@@ -151,6 +356,12 @@ def setup(app):
 import inspect
 from os.path import relpath, dirname
 
+# Directory containing the control package (used to compute relative paths)
+_CTRL_DIR = dirname(control.__file__)
+
+# Map from absolute source file names to paths relative to _CTRL_DIR
+_FILE_CACHE = {}
+
 def linkcode_resolve(domain, info):
     """
     Determine the URL corresponding to Python object
@@ -158,8 +369,13 @@ def linkcode_resolve(domain, info):
     if domain != 'py':
         return None
 
-    modname = info['module']
-    fullname = info['fullname']
+    return _linkcode_resolve(info['module'], info['fullname'])
+
+@functools.lru_cache(maxsize=None)
+def _linkcode_resolve(modname, fullname):
+    # Only objects in the control package have source links
+    if modname is None or not modname.startswith("control"):
+        return None
 
     submod = sys.modules.get(modname)
     if submod is None:
@@ -172,6 +388,11 @@ def linkcode_resolve(domain, info):
         except Exception:
             return None
 
+    # Ignore re-exports as their source files are not within the control repo
+    module = inspect.getmodule(obj)
+    if module is None or not module.__name__.startswith("control"):
+        return None
+
     # strip decorators, which would resolve to the source of the decorator
     # possibly an upstream bug in getsourcefile, bpo-1764286
     try:
@@ -189,17 +410,17 @@ def linkcode_resolve(domain, info):
     if not fn:
         return None
 
-    # Ignore re-exports as their source files are not within the numpy repo
-    module = inspect.getmodule(obj)
-    if module is not None and not module.__name__.startswith("control"):
-        return None
-
+    # Locate the source lines (file contents are cached by linecache)
     try:
-        source, lineno = inspect.getsourcelines(obj)
+        lines, lnum = inspect.findsource(obj)
+        source = inspect.getblock(lines[lnum:])
+        lineno = None if inspect.ismodule(obj) else lnum + 1
     except Exception:
         lineno = None
 
-    fn = relpath(fn, start=dirname(control.__file__))
+    if fn not in _FILE_CACHE:
+        _FILE_CACHE[fn] = relpath(fn, start=_CTRL_DIR)
+    fn = _FILE_CACHE[fn]
 
     if lineno:
         linespec = "#L%d-L%d" % (lineno, lineno + len(source) - 1)
@@ -207,7 +428,7 @@ def linkcode_resolve(domain, info):
         linespec = ""
 
     base_url = "https://github.com/python-control/python-control/blob/"
-    if release != version:      # development release
+    if _dev_build:              # development release
         return base_url + "main/control/%s%s" % (fn, linespec)
     else:                       # specific version
         return base_url + "%s/control/%s%s" % (version, fn, linespec)
@@ -218,6 +439,9 @@ numpydoc_show_class_members = False
 # Don't create a Sphinx TOC for the lists of class methods and attributes
 numpydoc_class_members_toctree = False
 
+# Don't cross-reference parameter types (avoids extra processing per parameter)
+numpydoc_xref_param_type = False
+
 # -- Options for HTMLHelp output ---------------------------------------------
 
 # Output file base name for HTML help builder.